@@ -4,3 +4,7 @@ class ResponseStatusNotOK(Exception):
 
 class TokenCheckError(Exception):
     """Ошибка окружения."""
+
+
+class ResponseDecodeError(Exception):
+    """Ответ сервера не удалось разобрать как JSON."""
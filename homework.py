@@ -1,5 +1,12 @@
+import atexit
+import copy
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import signal
+import sys
 import time
 from datetime import datetime
 from http import HTTPStatus
@@ -8,9 +15,9 @@ import requests
 from dotenv import load_dotenv
 from telebot import TeleBot
 
-from exceptions import ResponseStatusNotOK, TokenCheckError
+from exceptions import (ResponseDecodeError, ResponseStatusNotOK,
+                        TokenCheckError)
 
-os.environ.clear()
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
@@ -18,6 +25,11 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+MAX_RETRY_PERIOD = 3600
+RETRY_JITTER = 0.1
+ERROR_RESEND_PERIOD = 3600
+# Таймауты (на соединение, на чтение ответа) в секундах.
+REQUEST_TIMEOUT = (5, 30)
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -26,31 +38,74 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+EXPECTED_STATUSES = '|'.join(HOMEWORK_VERDICTS)
+# Параметры запроса собираются один раз и не являются константой:
+# get_api_answer() на каждом вызове переписывает в них from_date.
+# Опрос API идёт в одном потоке, поэтому правка на месте безопасна.
+_request_params = {
+    'url': ENDPOINT,
+    'params': {'from_date': 0},
+    'timeout': REQUEST_TIMEOUT,
+}
+# Заголовки с токеном не попадают ни в лог, ни в текст ошибок.
+REQUEST_PARAMS_MSG = 'Эндпоинт: %(url)s, %(params)s'
+REQUEST_DEBUG_MSG = (
+    'Отправляем запрос со следующими параметрами: ' + REQUEST_PARAMS_MSG
+)
+
+# Запись в файл и консоль идёт в отдельном потоке QueueListener, а вызовы
+# logger.* в основном цикле только кладут запись в очередь.
+file_handler = logging.FileHandler(
+    os.path.expanduser('~/.homework_bot.log'), mode='w', encoding='utf-8'
+)
+file_handler.setFormatter(logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s - %(filename)s '
+    '- %(name)s - %(lineno)d'
+))
+# В файл пишутся все записи, в консоль — только записи этого модуля.
+stream_handler = logging.StreamHandler()
+stream_handler.addFilter(logging.Filter(__name__))
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler для очереди внутри одного процесса."""
 
+    def prepare(self, record):
+        """Подставляет аргументы в сообщение, сохраняя exc_info.
+
+        Текст собирается в вызывающем потоке, пока аргументы не изменились.
+        exc_info остаётся в записи, поэтому трейсбэк выводится форматтером
+        обработчика после строки сообщения, а не внутри неё.
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        return record
+
+
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    log_queue, file_handler, stream_handler, respect_handler_level=True,
+)
 logging.basicConfig(
-    level=logging.DEBUG,
-    filename=os.path.expanduser('~/.homework_bot.log'),
-    filemode='w',
-    encoding='utf-8',
-    format=('%(asctime)s - %(levelname)s - %(message)s - %(filename)s '
-            '- %(name)s - %(lineno)d'),
+    level=logging.DEBUG, handlers=[LocalQueueHandler(log_queue)]
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler())
 
 
 def check_tokens():
     """Проверяет доступность необходимых переменных окружения."""
-    lost_tokens = []
-    for name, value in (
-        ('PRACTICUM_TOKEN', PRACTICUM_TOKEN,),
-        ('TELEGRAM_TOKEN', TELEGRAM_TOKEN,),
-        ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID,),
-    ):
-        if not value:
-            lost_tokens.append(name)
-            logger.critical(f'Не найдена переменная окружения: {name}')
+    tokens = {
+        'PRACTICUM_TOKEN': PRACTICUM_TOKEN,
+        'TELEGRAM_TOKEN': TELEGRAM_TOKEN,
+        'TELEGRAM_CHAT_ID': TELEGRAM_CHAT_ID,
+    }
+    lost_tokens = [name for name, value in tokens.items() if not value]
     if lost_tokens:
+        for name in lost_tokens:
+            logger.critical('Не найдена переменная окружения: %s', name)
         raise TokenCheckError('Не найдены необходимые переменные окружения: '
                               f'{", ".join(lost_tokens)}')
 
@@ -63,10 +118,10 @@ def send_message(bot, message):
     try:
         bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
     except Exception as tg_error:
-        logger.error(f'Сообщение в Телеграм не отправлено: {tg_error}.'
-                     f'Текст сообщения: {message}')
+        logger.error('Сообщение в Телеграм не отправлено: %s. '
+                     'Текст сообщения: %s', tg_error, message)
         return False
-    logger.debug(f'В Телеграм отправлено сообщение: {message}')
+    logger.debug('В Телеграм отправлено сообщение: %s', message)
     return True
 
 
@@ -77,39 +132,45 @@ def get_api_answer(timestamp):
     ожидает получить JSON. В случае успешного запроса возвращает ответ API,
     приведённый к типам данных Python.
     """
-    request_params = {
-        'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': {'from_date': timestamp}
-    }
-    params_msg = (
-        'Эндпоинт: {url}, {headers}, {params}'.format(**request_params)
-    )
-    logger.debug(f'Отправляем запрос со следующими параметрами: {params_msg}')
+    _request_params['params']['from_date'] = timestamp
+    logger.debug(REQUEST_DEBUG_MSG, _request_params)
     try:
-        response = requests.get(**request_params)
+        response = requests.get(headers=HEADERS, **_request_params)
     except requests.exceptions.RequestException as request_error:
+        if isinstance(request_error, requests.exceptions.Timeout):
+            reason = ('Сервер не ответил за отведённое время '
+                      f'{REQUEST_TIMEOUT}.')
+        else:
+            reason = 'Ошибка запроса.'
         raise ConnectionError(
-            'Ошибка запроса. Запрос с параметрами: '
-            f'{params_msg} завершился ошибкой {request_error}'
-        )
+            f'{reason} Запрос с параметрами: '
+            f'{REQUEST_PARAMS_MSG % _request_params} '
+            f'завершился ошибкой {request_error}'
+        ) from None
     if response.status_code != HTTPStatus.OK:
         raise ResponseStatusNotOK('Запрошенный ресурс недоступен.'
                                   f'Код ответа: {response.status_code}'
                                   f'Причина: {response.reason}'
                                   f'Ответ сервера: {response.text}')
-    return response.json()
+    try:
+        return response.json()
+    except ValueError as decode_error:
+        raise ResponseDecodeError('Ответ сервера не является корректным '
+                                  f'JSON: {decode_error}') from None
 
 
 def check_response(response):
     """Проверяет ответ на соответствие документации API."""
-    if not isinstance(response, dict):
+    try:
+        homeworks = response['homeworks']
+    except TypeError:
         raise TypeError('В ответе сервера ожидали dict, а получили '
-                        f'{response.__class__.__name__}')
-    if 'homeworks' not in response:
-        raise TypeError('В ответе сервера не найден ключ "homeworks"')
-    homeworks = response['homeworks']
-    if not isinstance(homeworks, list):
+                        f'{response.__class__.__name__}') from None
+    except KeyError:
+        raise TypeError(
+            'В ответе сервера не найден ключ "homeworks"'
+        ) from None
+    if type(homeworks) is not list:
         raise TypeError('В ответет сервера под ключом "homeworks" ожидали'
                         'list, а получили '
                         f'{homeworks.__class__.__name__}!')
@@ -126,12 +187,45 @@ def parse_status(homework):
         raise KeyError('Ключ "homework_name" не найден в ответе API')
     homework_name = homework['homework_name']
     homework_status = homework['status']
-    if homework_status not in HOMEWORK_VERDICTS:
+    verdict = HOMEWORK_VERDICTS.get(homework_status)
+    if verdict is None:
         raise ValueError(f'Полученный статус домашки "{homework_status}" '
                          'не соответствует ни одному из ожидаемых: '
-                         f'{"|".join(HOMEWORK_VERDICTS.keys())}')
+                         f'{EXPECTED_STATUSES}')
     return (f'Изменился статус проверки работы "{homework_name}". '
-            f'{HOMEWORK_VERDICTS[homework_status]}')
+            f'{verdict}')
+
+
+def send_verdicts(bot, homeworks, reported_statuses):
+    """Отправляет в Telegram вердикты по всем домашкам из ответа API.
+
+    reported_statuses хранит последний доставленный статус каждой домашки,
+    чтобы при повторном запросе не дублировать уже отправленные вердикты.
+    Возвращает True, если доставлены все вердикты.
+    """
+    delivered = True
+    # API отдаёт домашки от новых к старым, а в чат шлём по порядку.
+    for homework in reversed(homeworks):
+        verdict = parse_status(homework)
+        homework_name = homework['homework_name']
+        if reported_statuses.get(homework_name) == homework['status']:
+            continue
+        if send_message(bot, verdict):
+            reported_statuses[homework_name] = homework['status']
+        else:
+            delivered = False
+    return delivered
+
+
+def stop_bot(signum, frame):
+    """Завершает работу бота по сигналу SIGTERM или SIGINT.
+
+    Выход через SystemExit прерывает time.sleep() в основном цикле и даёт
+    отработать обработчикам atexit, которые дописывают очередь логов.
+    """
+    logger.info('Получен сигнал %s, бот остановлен.',
+                signal.Signals(signum).name)
+    sys.exit(0)
 
 
 def main():
@@ -141,28 +235,51 @@ def main():
     timestamp = int(time.time())
     send_message(bot, (f'{datetime.now().strftime("%d.%m.%y %H:%M")}: '
                        'Начали отслеживать статус домашки.'))
-    prev_status = ''
+    reported_statuses = {}
+    sent_errors = {}
+    retry_period = backoff = RETRY_PERIOD
     while True:
         try:
             response = get_api_answer(timestamp)
             homeworks = check_response(response)
             if not homeworks:
                 logger.debug('В ответе сервера нет ни одной домашки.')
-                continue
-            homework = homeworks[0]
-            verdict = parse_status(homework)
-            if (homework['status'] != prev_status
-               and send_message(bot, verdict)):
-                prev_status = homework['status']
+            # Сдвигаем начало периода, только когда доставлены все
+            # вердикты, иначе на следующей итерации недоставленные домашки
+            # не попадут в ответ.
+            if send_verdicts(bot, homeworks, reported_statuses):
                 timestamp = response.get('current_date', timestamp)
+            # Паузу сбрасываем только после полностью обработанного ответа:
+            # ошибки в данных (например, неизвестный статус) тоже
+            # повторяются с нарастающей паузой.
+            retry_period = backoff = RETRY_PERIOD
         except Exception as error:
             err_msg = f'Сбой в работе программы: {error}'
             logger.error(err_msg, exc_info=True)
-            if err_msg != prev_status and send_message(bot, err_msg):
-                prev_status = err_msg
-        finally:
-            time.sleep(RETRY_PERIOD)
+            # Текст ошибки меняется от запроса к запросу (ответ сервера,
+            # адреса объектов), поэтому повторы отсекаем по типу ошибки.
+            # Подробности каждого сбоя остаются в логе.
+            error_key = type(error).__name__
+            now = time.time()
+            sent_errors = {
+                key: sent_at for key, sent_at in sent_errors.items()
+                if now - sent_at < ERROR_RESEND_PERIOD
+            }
+            if error_key not in sent_errors and send_message(bot, err_msg):
+                sent_errors[error_key] = now
+            # После первого сбоя ждём обычные RETRY_PERIOD, при каждом
+            # следующем подряд удваиваем паузу (до MAX_RETRY_PERIOD)
+            # и добавляем случайный разброс.
+            retry_period = backoff
+            if backoff > RETRY_PERIOD:
+                retry_period += random.uniform(0, backoff * RETRY_JITTER)
+            backoff = min(backoff * 2, MAX_RETRY_PERIOD)
+        # Пауза стоит после try, а не в finally, чтобы по SystemExit
+        # из stop_bot() бот выходил сразу.
+        time.sleep(retry_period)
 
 
 if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, stop_bot)
+    signal.signal(signal.SIGINT, stop_bot)
     main()
@@ -0,0 +1,255 @@
+import json
+import random
+import signal
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+
+FAILURE = ConnectionError('Сервер недоступен')
+EMPTY_RESPONSE = {'homeworks': [], 'current_date': 1000198000}
+
+
+class TestReliability:
+
+    def mock_main(self, monkeypatch, homework_module, outcomes):
+        """
+        Mock get_api_answer() to replay outcomes and record requested
+        timestamps, and time.sleep() to record pauses; main() is interrupted
+        once outcomes run out.
+        """
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+        monkeypatch.setattr(
+            homework_module, 'TeleBot',
+            lambda token: check_utils.MockTelegramBot()
+        )
+        outcomes = list(outcomes)
+        sleeps = []
+        timestamps = []
+
+        def mock_get_api_answer(timestamp):
+            timestamps.append(timestamp)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        def mock_sleep(secs):
+            sleeps.append(secs)
+            if not outcomes:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', mock_get_api_answer
+        )
+        monkeypatch.setattr(time, 'sleep', mock_sleep)
+        return sleeps, timestamps
+
+    def test_main_backoff_after_failures(self, monkeypatch, homework_module):
+        sleeps, _ = self.mock_main(
+            monkeypatch, homework_module,
+            [FAILURE] * 5 + [EMPTY_RESPONSE, FAILURE]
+        )
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: True
+        )
+        monkeypatch.setattr(random, 'uniform', lambda a, b: b)
+
+        with pytest.raises(check_utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        assert sleeps == pytest.approx(
+            [600, 1320, 2640, 3960, 3960, 600, 600]
+        ), (
+            'Убедитесь, что после первого сбоя бот ждёт `RETRY_PERIOD`, '
+            'при следующих сбоях подряд пауза удваивается до '
+            '`MAX_RETRY_PERIOD` с разбросом, а после успешного запроса '
+            'снова равна `RETRY_PERIOD`.'
+        )
+
+    def test_main_backoff_on_data_errors(self, monkeypatch, homework_module):
+        unknown_status = {
+            'homeworks': [{'homework_name': 'hw1.zip', 'status': 'unknown'}],
+            'current_date': 1000198000,
+        }
+        sleeps, _ = self.mock_main(
+            monkeypatch, homework_module, [unknown_status] * 3
+        )
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: True
+        )
+        monkeypatch.setattr(random, 'uniform', lambda a, b: 0)
+
+        with pytest.raises(check_utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        assert sleeps == [600, 1200, 2400], (
+            'Убедитесь, что пауза нарастает и при повторяющихся ошибках '
+            'в данных ответа API, например при неизвестном статусе.'
+        )
+
+    def test_main_reports_every_homework(self, monkeypatch, homework_module):
+        first_date, second_date = 1000198000, 1000198600
+        response = {
+            'homeworks': [
+                {'homework_name': 'hw2.zip', 'status': 'approved'},
+                {'homework_name': 'hw1.zip', 'status': 'approved'},
+            ],
+            'current_date': first_date,
+        }
+        _, timestamps = self.mock_main(
+            monkeypatch, homework_module,
+            [response, dict(response, current_date=second_date),
+             EMPTY_RESPONSE]
+        )
+        sent = []
+        failed_once = []
+
+        def mock_send_message(bot, message):
+            if 'hw2.zip' in message and not failed_once:
+                failed_once.append(message)
+                return False
+            sent.append(message)
+            return True
+
+        monkeypatch.setattr(homework_module, 'send_message', mock_send_message)
+
+        with pytest.raises(check_utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        verdicts = [message for message in sent if '.zip' in message]
+        assert len(verdicts) == 2, (
+            'Убедитесь, что бот отправляет вердикт по каждой домашке из '
+            'ответа API и не дублирует уже доставленные вердикты.'
+        )
+        assert 'hw1.zip' in verdicts[0] and 'hw2.zip' in verdicts[1]
+        assert timestamps[1] == timestamps[0], (
+            'Убедитесь, что при недоставленном вердикте начало периода '
+            'не сдвигается.'
+        )
+        assert timestamps[2] == second_date, (
+            'Убедитесь, что после доставки всех вердиктов начало периода '
+            'сдвигается на `current_date` из ответа API.'
+        )
+
+    def test_main_resends_same_error_after_period(
+            self, monkeypatch, homework_module
+    ):
+        self.mock_main(monkeypatch, homework_module, [FAILURE] * 4)
+        clock = [1000.0]
+        sent_at = []
+
+        def mock_sleep(secs):
+            clock[0] += secs
+            if len(sent_at) > 1 or clock[0] > 10000:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        def mock_send_message(bot, message):
+            if str(FAILURE) in message:
+                sent_at.append(clock[0])
+            return True
+
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        monkeypatch.setattr(time, 'sleep', mock_sleep)
+        monkeypatch.setattr(random, 'uniform', lambda a, b: 0)
+        monkeypatch.setattr(homework_module, 'send_message', mock_send_message)
+
+        with pytest.raises(check_utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        # Сбои в моменты 1000, 1600, 2800 и 5200: повтор в пределах
+        # ERROR_RESEND_PERIOD не отправляется, после него — отправляется.
+        assert sent_at == [1000.0, 5200.0], (
+            'Убедитесь, что одинаковое сообщение об ошибке отправляется '
+            'не чаще раза в `ERROR_RESEND_PERIOD`.'
+        )
+
+    def test_main_dedupes_same_error_type(self, monkeypatch, homework_module):
+        self.mock_main(
+            monkeypatch, homework_module,
+            [ConnectionError('<HTTPSConnection object at 0x7f01>'),
+             ConnectionError('<HTTPSConnection object at 0x7f02>')]
+        )
+        sent = []
+
+        def mock_send_message(bot, message):
+            if 'HTTPSConnection' in message:
+                sent.append(message)
+            return True
+
+        monkeypatch.setattr(homework_module, 'send_message', mock_send_message)
+
+        with pytest.raises(check_utils.BreakInfiniteLoop):
+            homework_module.main()
+
+        assert len(sent) == 1, (
+            'Убедитесь, что однотипные ошибки с разным текстом не '
+            'отправляются в Telegram повторно в пределах '
+            '`ERROR_RESEND_PERIOD`.'
+        )
+
+    def test_get_api_answer_not_json(
+            self, monkeypatch, current_timestamp, homework_module
+    ):
+        class MockResponseNotJSON(check_utils.MockResponseGET):
+            def json(self):
+                raise json.JSONDecodeError('Expecting value', '<html>', 0)
+
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: MockResponseNotJSON(
+                http_status=HTTPStatus.OK
+            )
+        )
+        with pytest.raises(homework_module.ResponseDecodeError) as error:
+            homework_module.get_api_answer(current_timestamp)
+        assert error.value.__suppress_context__, (
+            'Убедитесь, что ошибка разбора JSON перевыбрасывается '
+            'с `from None`.'
+        )
+
+    def test_get_api_answer_timeout(
+            self, monkeypatch, current_timestamp, homework_module
+    ):
+        def mock_request_get_with_timeout(*args, **kwargs):
+            raise requests.exceptions.ReadTimeout('Read timed out.')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_timeout)
+        with pytest.raises(ConnectionError, match='не ответил') as error:
+            homework_module.get_api_answer(current_timestamp)
+        assert homework_module.PRACTICUM_TOKEN not in str(error.value), (
+            'Убедитесь, что токен не попадает в текст ошибки.'
+        )
+        assert error.value.__suppress_context__, (
+            'Убедитесь, что ошибка запроса перевыбрасывается с `from None`.'
+        )
+
+    def test_stop_bot_exits(self, homework_module):
+        with pytest.raises(SystemExit) as error:
+            homework_module.stop_bot(signal.SIGTERM, None)
+        assert error.value.code == 0, (
+            'Убедитесь, что по сигналу бот завершается с кодом 0.'
+        )
+
+    def test_main_exits_without_sleep_on_stop(
+            self, monkeypatch, homework_module
+    ):
+        sleeps, _ = self.mock_main(
+            monkeypatch, homework_module, [SystemExit(0), EMPTY_RESPONSE]
+        )
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: True
+        )
+
+        with pytest.raises(SystemExit):
+            homework_module.main()
+
+        assert not sleeps, (
+            'Убедитесь, что при остановке бота во время запроса `main()` '
+            'завершается сразу, без паузы `time.sleep()`.'
+        )